@@ -4,21 +4,25 @@
 import os
 import sys
 import json
+import re
 import subprocess
 import threading
 import time
 import logging
 import shutil
-from datetime import datetime
+import types
+import itertools
+from functools import partial
+from logging.handlers import TimedRotatingFileHandler
 from pathlib import Path
 
 try:
     from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
                                 QPushButton, QLabel, QFileDialog, QListWidget, QListWidgetItem,
                                 QComboBox, QSlider, QCheckBox, QTabWidget, QGroupBox,
-                                QTextEdit, QProgressBar, QSplitter, QMessageBox,
+                                QTextEdit, QPlainTextEdit, QProgressBar, QSplitter, QMessageBox,
                                 QSpinBox, QGridLayout, QLineEdit)
-    from PyQt5.QtCore import Qt, QThread, pyqtSignal, QTimer
+    from PyQt5.QtCore import Qt, QObject, QThread, QThreadPool, QRunnable, pyqtSignal, QTimer
     from PyQt5.QtMultimedia import QMediaPlayer, QMediaContent
     from PyQt5.QtMultimediaWidgets import QVideoWidget
     QT_AVAILABLE = True
@@ -26,12 +30,18 @@ except ImportError:
     QMessageBox.critical(None, "错误", "PyQt5未安装！")
     sys.exit(1)
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # 配置日志
 LOG_DIR = "/config/ffmpeg-gui/logs"
 os.makedirs(LOG_DIR, exist_ok=True)
 logging.basicConfig(level=logging.INFO,
                     format='%(asctime)s - %(levelname)s - %(message)s',
-                    handlers=[logging.FileHandler(f"{LOG_DIR}/ffmpeg_gui_{datetime.now().strftime('%Y%m%d')}.log"),
+                    handlers=[TimedRotatingFileHandler(f"{LOG_DIR}/ffmpeg_gui.log", when='midnight',
+                                                       backupCount=7, encoding='utf-8'),
                               logging.StreamHandler()])
 logger = logging.getLogger(__name__)
 
@@ -39,71 +49,161 @@ logger = logging.getLogger(__name__)
 CONFIG_PATH = "/config/ffmpeg-gui/config.json"
 CONFIG_TEMPLATE_PATH = "/app/config.json.template"
 
+# 输出读取参数
+READ_CHUNK_SIZE = 65536
+PIPE_SIZE = 1 << 20
+
+# 时长/进度解析
+DURATION_RE = re.compile(rb"Duration:\s*(\d+):(\d+):(\d+)(?:\.(\d+))?")
+TIME_RE = re.compile(rb"time=(\d+):(\d+):(\d+)(?:\.(\d+))?")
+
+# 停止转换时的等待时间（秒）
+STOP_GRACE_TIMEOUT = 2
+STOP_TERM_TIMEOUT = 1
+# 关闭窗口时等待线程池退出的时间（毫秒）
+POOL_SHUTDOWN_TIMEOUT_MS = 5000
+
+# 日志合并发送间隔（秒）
+LOG_FLUSH_INTERVAL = 0.1
+# 日志窗口保留行数
+LOG_MAX_LINES = 2000
+
+# 旧版配置缺少flag时使用的参数映射
+VIDEO_PARAM_FLAGS = {
+    "CRF": "-crf",
+    "CPU Used": "-cpu-used",
+    "Tile Columns": "-tile-columns",
+    "Tile Rows": "-tile-rows",
+    "Threads": "-threads",
+    "Preset": "-preset",
+    "Tune": "-tune",
+    "Deadline": "-deadline",
+}
+AUDIO_PARAM_FLAGS = {
+    "Bitrate": "-b:a",
+}
+
+# 支持的视频扩展名
+VIDEO_EXTS = frozenset({'.mp4', '.mkv', '.avi', '.mov', '.webm'})
+# 扫描结果分批发送数量
+SCAN_BATCH_SIZE = 500
+
+def parse_config(path):
+    """解析配置文件（优先使用orjson）"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data.decode('utf-8'))
+
 def load_config():
-    """加载配置文件"""
+    """加载配置文件（只读）"""
     if not os.path.exists(CONFIG_PATH):
         os.makedirs(os.path.dirname(CONFIG_PATH), exist_ok=True)
         shutil.copy(CONFIG_TEMPLATE_PATH, CONFIG_PATH)
     try:
-        with open(CONFIG_PATH, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        cfg = parse_config(CONFIG_PATH)
     except Exception as e:
         logger.error(f"加载配置失败: {e}")
-        with open(CONFIG_TEMPLATE_PATH, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        cfg = parse_config(CONFIG_TEMPLATE_PATH)
+    return types.MappingProxyType(cfg)
+
+def match_to_ms(m):
+    """将时:分:秒.小数的匹配结果转换为整数毫秒"""
+    ms = int(m[1])*3600000 + int(m[2])*60000 + int(m[3])*1000
+    if m[4]:
+        ms += int(m[4][:3].ljust(3, b"0"))
+    return ms
+
+def scan_video_files(folder, should_stop=None):
+    """递归扫描文件夹中的视频文件，should_stop返回True时提前结束"""
+    stack = [folder]
+    while stack:
+        if should_stop is not None and should_stop():
+            return
+        try:
+            with os.scandir(stack.pop()) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif os.path.splitext(entry.name)[1].lower() in VIDEO_EXTS:
+                        yield entry.path
+        except OSError as e:
+            logger.warning(f"扫描目录失败: {e}")
 
-class FFmpegWorker(QThread):
-    """转换工作线程"""
+class WorkerSignals(QObject):
+    """转换任务信号"""
     progress = pyqtSignal(int)
     status = pyqtSignal(str)
     log = pyqtSignal(str)
     finished = pyqtSignal(bool, str)
-    
+
+class FFmpegWorker(QRunnable):
+    """转换任务（由线程池调度）"""
     def __init__(self, command, input_file, output_file):
         super().__init__()
+        # 任务对象由MainWindow持有，不交给线程池释放
+        self.setAutoDelete(False)
+        self.signals = WorkerSignals()
+        self.progress = self.signals.progress
+        self.status = self.signals.status
+        self.log = self.signals.log
+        self.finished = self.signals.finished
         self.command = command
         self.input_file = input_file
         self.output_file = output_file
         self.process = None
         self.aborted = False
+        self.running = False
+        self._last_pct = -1
+        self._log_buf = []
+        self._last_flush = time.monotonic()
     
     def run(self):
+        # 排队期间已取消
+        if self.aborted:
+            return
+        self.running = True
         try:
             self.status.emit("开始转换...")
             self.log.emit(f"执行命令: {' '.join(self.command)}")
-            self.process = subprocess.Popen(self.command, stdout=subprocess.PIPE, 
-                                          stderr=subprocess.STDOUT, text=True, bufsize=1)
+            popen_kwargs = {}
+            if sys.version_info >= (3, 10):
+                popen_kwargs["pipesize"] = PIPE_SIZE
+            self.process = subprocess.Popen(self.command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, 
+                                          stderr=subprocess.STDOUT, bufsize=-1, **popen_kwargs)
+            # 进程启动前已请求停止
+            if self.aborted:
+                self.stop()
             
-            duration = None
-            for line in iter(self.process.stdout.readline, ''):
+            duration_ms = 0
+            for line in self.read_lines():
+                self._queue_log(line.strip())
+                # 取消后继续读取输出直到进程退出，仅跳过解析
                 if self.aborted:
-                    self.process.terminate()
-                    self.status.emit("已取消")
-                    self.finished.emit(False, "转换取消")
-                    return
-                self.log.emit(line.strip())
+                    continue
                 
                 # 解析时长
-                if not duration and "Duration:" in line:
-                    try:
-                        dur_str = line.split("Duration: ")[1].split(",")[0]
-                        h, m, s = dur_str.split(":")
-                        duration = int(h)*3600 + int(m)*60 + float(s)
-                    except:
-                        pass
+                if not duration_ms:
+                    m = DURATION_RE.search(line)
+                    if m:
+                        duration_ms = match_to_ms(m)
                 
                 # 解析进度
-                if "time=" in line and duration:
-                    try:
-                        time_str = line.split("time=")[1].split(" ")[0]
-                        h, m, s = time_str.split(":")
-                        current = int(h)*3600 + int(m)*60 + float(s)
-                        self.progress.emit(int(current/duration*100))
-                    except:
-                        pass
+                if duration_ms:
+                    m = TIME_RE.search(line)
+                    if m:
+                        pct = match_to_ms(m)*100 // duration_ms
+                        if pct != self._last_pct:
+                            self._last_pct = pct
+                            self.progress.emit(pct)
             
+            self._flush_log()
             self.process.wait()
-            if self.process.returncode == 0:
+            if self.aborted:
+                self.status.emit("已取消")
+                self.finished.emit(False, "转换取消")
+            elif self.process.returncode == 0:
                 self.progress.emit(100)
                 self.status.emit("完成")
                 self.finished.emit(True, "转换成功")
@@ -111,15 +211,100 @@ class FFmpegWorker(QThread):
                 self.status.emit("失败")
                 self.finished.emit(False, f"返回码: {self.process.returncode}")
         except Exception as e:
+            self._flush_log()
             self.log.emit(f"错误: {e}")
             self.status.emit("错误")
             self.finished.emit(False, str(e))
+        finally:
+            self.close_pipes()
+            self.running = False
+    
+    def _queue_log(self, line):
+        """缓存原始日志行，按间隔合并发送"""
+        self._log_buf.append(line)
+        if time.monotonic() - self._last_flush > LOG_FLUSH_INTERVAL:
+            self._flush_log()
+    
+    def _flush_log(self):
+        """解码并发送缓存的日志"""
+        if self._log_buf:
+            self.log.emit(b"\n".join(self._log_buf).decode("utf-8", "replace"))
+            self._log_buf.clear()
+        self._last_flush = time.monotonic()
+    
+    def read_lines(self):
+        """按块读取输出，以\\r/\\n切分为行"""
+        carry = bytearray()
+        while True:
+            chunk = self.process.stdout.read1(READ_CHUNK_SIZE)
+            if not chunk:
+                break
+            carry += chunk
+            lines = carry.replace(b"\r", b"\n").split(b"\n")
+            carry = lines.pop()
+            for line in lines:
+                if line:
+                    yield line
+        if carry:
+            yield carry
+    
+    def close_pipes(self):
+        """关闭进程管道，释放文件描述符"""
+        if self.process is None:
+            return
+        for pipe in (self.process.stdin, self.process.stdout):
+            try:
+                pipe.close()
+            except OSError:
+                pass
+    
+    def shutdown_process(self):
+        """发送q让ffmpeg正常结束，超时后依次terminate/kill"""
+        try:
+            self.process.stdin.write(b"q\n")
+            self.process.stdin.flush()
+        except (OSError, ValueError):
+            pass
+        try:
+            self.process.wait(timeout=STOP_GRACE_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=STOP_TERM_TIMEOUT)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
     
     def stop(self):
         """停止转换"""
         self.aborted = True
-        if self.process:
-            self.process.terminate()
+        if self.process and self.process.poll() is None:
+            # 后台等待退出，避免阻塞界面
+            threading.Thread(target=self.shutdown_process, daemon=True).start()
+
+class FolderScanner(QThread):
+    """文件夹扫描线程"""
+    found = pyqtSignal(list)
+    
+    def __init__(self, folder):
+        super().__init__()
+        self.folder = folder
+        self.aborted = False
+    
+    def run(self):
+        batch = []
+        for path in scan_video_files(self.folder, lambda: self.aborted):
+            batch.append(path)
+            if len(batch) >= SCAN_BATCH_SIZE:
+                if self.aborted:
+                    return
+                self.found.emit(batch)
+                batch = []
+        if batch and not self.aborted:
+            self.found.emit(batch)
+    
+    def abort(self):
+        """中止扫描"""
+        self.aborted = True
 
 class TaskItemWidget(QWidget):
     """任务项"""
@@ -159,7 +344,9 @@ class MainWindow(QMainWindow):
         super().__init__()
         self.config = load_config()
         self.tasks = {}
-        self.active_tasks = 0
+        self.pool = QThreadPool.globalInstance()
+        self._task_seq = itertools.count()
+        self._scanner = None
         self.init_ui()
     
     def init_ui(self):
@@ -203,7 +390,8 @@ class MainWindow(QMainWindow):
         # 文件按钮
         btn_layout = QHBoxLayout()
         btn_layout.addWidget(QPushButton("添加文件", clicked=self.add_files))
-        btn_layout.addWidget(QPushButton("添加文件夹", clicked=self.add_folder))
+        self.add_folder_btn = QPushButton("添加文件夹", clicked=self.add_folder)
+        btn_layout.addWidget(self.add_folder_btn)
         btn_layout.addWidget(QPushButton("移除选中", clicked=self.remove_files))
         btn_layout.addWidget(QPushButton("清空", clicked=self.clear_files))
         file_layout.addLayout(btn_layout)
@@ -235,14 +423,16 @@ class MainWindow(QMainWindow):
         # 编码器选择
         video_layout.addWidget(QLabel("视频编码器："))
         self.video_codec = QComboBox()
-        for codec in self.config["video_codecs"].keys():
-            self.video_codec.addItem(codec)
-        self.video_codec.currentTextChanged.connect(self.update_video_params)
+        # 硬件编码器仅在enable_hw_accel开启时显示
+        hw_enabled = self.config["default_settings"].get("enable_hw_accel", False)
+        self._video_codec_names = [name for name, codec in self.config["video_codecs"].items()
+                                   if hw_enabled or not codec.get("hwaccel")]
+        self.video_codec.addItems(self._video_codec_names)
+        self.video_codec.currentIndexChanged[int].connect(self.on_video_codec_change)
         video_layout.addWidget(self.video_codec)
         
         # 编码器参数
         self.video_params_group = QGroupBox("编码器参数")
-        self.video_params_layout = QVBoxLayout(self.video_params_group)
         self.update_video_params(self.video_codec.currentText())
         video_layout.addWidget(self.video_params_group)
         
@@ -278,14 +468,13 @@ class MainWindow(QMainWindow):
         # 音频设置
         ao_layout.addWidget(QLabel("音频编码器："))
         self.audio_codec = QComboBox()
-        for codec in self.config["audio_codecs"].keys():
-            self.audio_codec.addItem(codec)
-        self.audio_codec.currentTextChanged.connect(self.update_audio_params)
+        self._audio_codec_names = list(self.config["audio_codecs"].keys())
+        self.audio_codec.addItems(self._audio_codec_names)
+        self.audio_codec.currentIndexChanged[int].connect(self.on_audio_codec_change)
         ao_layout.addWidget(self.audio_codec)
         
         # 音频参数
         self.audio_params_group = QGroupBox("音频参数")
-        self.audio_params_layout = QVBoxLayout(self.audio_params_group)
         self.update_audio_params(self.audio_codec.currentText())
         ao_layout.addWidget(self.audio_params_group)
         
@@ -309,8 +498,9 @@ class MainWindow(QMainWindow):
         # 日志 + 开始按钮
         log_layout = QHBoxLayout()
         
-        self.log_text = QTextEdit()
+        self.log_text = QPlainTextEdit()
         self.log_text.setReadOnly(True)
+        self.log_text.setMaximumBlockCount(LOG_MAX_LINES)
         log_layout.addWidget(self.log_text, 1)
         
         self.start_btn = QPushButton("开始转换")
@@ -334,14 +524,32 @@ class MainWindow(QMainWindow):
         btn_layout.addWidget(QPushButton("清空已完成", clicked=self.clear_finished))
         layout.addLayout(btn_layout)
     
+    def reset_layout(self, widget):
+        """替换控件布局，旧布局及其子控件随临时控件一并销毁"""
+        old = widget.layout()
+        if old is not None:
+            QWidget().setLayout(old)
+        return QVBoxLayout(widget)
+    
+    def on_video_codec_change(self, index):
+        """视频编码器切换"""
+        if index >= 0:
+            self.update_video_params(self._video_codec_names[index])
+    
+    def on_audio_codec_change(self, index):
+        """音频编码器切换"""
+        if index >= 0:
+            self.update_audio_params(self._audio_codec_names[index])
+    
     def update_video_params(self, codec_name):
         """更新视频参数"""
         # 清空现有参数
-        for i in reversed(range(self.video_params_layout.count())):
-            self.video_params_layout.itemAt(i).widget().deleteLater()
+        self.video_params_layout = self.reset_layout(self.video_params_group)
         
         # 添加新参数
+        self.video_param_widgets = {}
         codec = self.config["video_codecs"][codec_name]
+        self.warn_missing_flags(codec_name, codec["params"], VIDEO_PARAM_FLAGS)
         for param in codec["params"]:
             if param["type"] == "slider":
                 group = QGroupBox(param["name"])
@@ -363,7 +571,7 @@ class MainWindow(QMainWindow):
                 self.video_params_layout.addWidget(group)
                 
                 # 保存控件引用
-                setattr(self, f"video_param_{param['name'].replace(' ', '_')}", slider)
+                self.video_param_widgets[param["name"]] = slider
             elif param["type"] == "combobox":
                 group = QGroupBox(param["name"])
                 h_layout = QHBoxLayout(group)
@@ -374,16 +582,17 @@ class MainWindow(QMainWindow):
                 h_layout.addWidget(combo)
                 self.video_params_layout.addWidget(group)
                 
-                setattr(self, f"video_param_{param['name'].replace(' ', '_')}", combo)
+                self.video_param_widgets[param["name"]] = combo
     
     def update_audio_params(self, codec_name):
         """更新音频参数"""
         # 清空现有参数
-        for i in reversed(range(self.audio_params_layout.count())):
-            self.audio_params_layout.itemAt(i).widget().deleteLater()
+        self.audio_params_layout = self.reset_layout(self.audio_params_group)
         
         # 添加新参数
+        self.audio_param_widgets = {}
         codec = self.config["audio_codecs"][codec_name]
+        self.warn_missing_flags(codec_name, codec["params"], AUDIO_PARAM_FLAGS)
         for param in codec["params"]:
             if param["type"] == "combobox":
                 group = QGroupBox(param["name"])
@@ -395,7 +604,7 @@ class MainWindow(QMainWindow):
                 h_layout.addWidget(combo)
                 self.audio_params_layout.addWidget(group)
                 
-                setattr(self, f"audio_param_{param['name'].replace(' ', '_')}", combo)
+                self.audio_param_widgets[param["name"]] = combo
     
     def on_res_change(self, res):
         """分辨率切换"""
@@ -419,23 +628,35 @@ class MainWindow(QMainWindow):
         """添加文件"""
         files, _ = QFileDialog.getOpenFileNames(self, "选择视频文件", "", 
                                                "视频文件 (*.mp4 *.mkv *.avi *.mov *.webm);;所有文件 (*.*)")
-        for f in files:
-            item = QListWidgetItem(os.path.basename(f))
-            item.setData(Qt.UserRole, f)
-            self.file_list.addItem(item)
+        if files:
+            self._append_files(files)
     
     def add_folder(self):
         """添加文件夹"""
         folder = QFileDialog.getExistingDirectory(self, "选择文件夹")
         if folder:
-            exts = ['.mp4', '.mkv', '.avi', '.mov', '.webm']
-            for root, _, files in os.walk(folder):
-                for f in files:
-                    if any(f.lower().endswith(ext) for ext in exts):
-                        path = os.path.join(root, f)
-                        item = QListWidgetItem(os.path.basename(path))
-                        item.setData(Qt.UserRole, path)
-                        self.file_list.addItem(item)
+            self.add_folder_btn.setEnabled(False)
+            self._scanner = FolderScanner(folder)
+            self._scanner.found.connect(self._append_files)
+            self._scanner.finished.connect(self.on_scan_finish)
+            self._scanner.start()
+    
+    def on_scan_finish(self):
+        """文件夹扫描完成"""
+        self._scanner = None
+        self.add_folder_btn.setEnabled(True)
+    
+    def _append_files(self, paths):
+        """批量添加文件到列表（一次布局和重绘）"""
+        sorting = self.file_list.isSortingEnabled()
+        self.file_list.setSortingEnabled(False)
+        self.file_list.setUpdatesEnabled(False)
+        for path in paths:
+            item = QListWidgetItem(os.path.basename(path))
+            item.setData(Qt.UserRole, path)
+            self.file_list.addItem(item)
+        self.file_list.setSortingEnabled(sorting)
+        self.file_list.setUpdatesEnabled(True)
     
     def remove_files(self):
         """移除选中文件"""
@@ -451,24 +672,12 @@ class MainWindow(QMainWindow):
         cmd = ["ffmpeg", "-y", "-i", input_file]
         
         # 视频编码器
-        codec_name = self.video_codec.currentText()
-        codec = self.config["video_codecs"][codec_name]
+        video_codecs = self.config["video_codecs"]
+        codec = video_codecs[self.video_codec.currentText()]
         cmd.extend(["-c:v", codec["encoder"]])
         
         # 视频参数
-        if codec["encoder"] == "libaom-av1":
-            cmd.extend(["-crf", str(self.video_param_CRF.value())])
-            cmd.extend(["-cpu-used", str(self.video_param_CPU_Used.value())])
-            cmd.extend(["-tile-columns", str(self.video_param_Tile_Columns.value())])
-            cmd.extend(["-tile-rows", str(self.video_param_Tile_Rows.value())])
-            cmd.extend(["-threads", str(self.video_param_Threads.value())])
-        elif codec["encoder"] == "libx265":
-            cmd.extend(["-crf", str(self.video_param_CRF.value())])
-            cmd.extend(["-preset", self.video_param_Preset.currentText()])
-            cmd.extend(["-tune", self.video_param_Tune.currentText()])
-        elif codec["encoder"] == "libx264":
-            cmd.extend(["-crf", str(self.video_param_CRF.value())])
-            cmd.extend(["-preset", self.video_param_Preset.currentText()])
+        self.extend_params(cmd, codec["params"], self.video_param_widgets, VIDEO_PARAM_FLAGS)
         
         # 分辨率
         res = self.resolution.currentText()
@@ -480,6 +689,14 @@ class MainWindow(QMainWindow):
                 w, h = res.split("x")
             cmd.extend(["-vf", f"scale={w}:{h}"])
         
+        # 硬件加速解码（置于-i之前）
+        if codec.get("hwaccel"):
+            hw_args = ["-hwaccel", codec["hwaccel"]]
+            # 软件缩放需要将解码帧回传到内存
+            if "-vf" not in cmd:
+                hw_args.extend(["-hwaccel_output_format", codec.get("hwfmt", "drm_prime")])
+            cmd[1:1] = hw_args
+        
         # 音频
         if self.copy_audio.isChecked():
             cmd.extend(["-c:a", "copy"])
@@ -487,12 +704,31 @@ class MainWindow(QMainWindow):
             audio_codec_name = self.audio_codec.currentText()
             audio_codec = self.config["audio_codecs"][audio_codec_name]
             cmd.extend(["-c:a", audio_codec["encoder"]])
-            cmd.extend(["-b:a", self.audio_param_Bitrate.currentText()])
+            self.extend_params(cmd, audio_codec["params"], self.audio_param_widgets, AUDIO_PARAM_FLAGS)
         
         # 输出文件
         cmd.append(output_file)
         return cmd
     
+    def warn_missing_flags(self, codec_name, params, fallback_flags):
+        """提示配置中未设置flag且无默认映射的参数"""
+        missing = [p["name"] for p in params
+                   if not p.get("flag") and p["name"] not in fallback_flags]
+        if missing:
+            logger.warning(f"{codec_name}参数{', '.join(missing)}未配置flag，已忽略")
+    
+    def extend_params(self, cmd, params, widgets, fallback_flags):
+        """按配置中的flag追加编码参数"""
+        for param in params:
+            flag = param.get("flag") or fallback_flags.get(param["name"])
+            if not flag:
+                continue
+            w = widgets.get(param["name"])
+            if w is None:
+                continue
+            val = w.value() if isinstance(w, QSlider) else w.currentText()
+            cmd.extend([flag, str(val)])
+    
     def start_convert(self):
         """开始转换"""
         if self.file_list.count() == 0:
@@ -503,22 +739,36 @@ class MainWindow(QMainWindow):
         output_dir = self.output_dir.text()
         os.makedirs(output_dir, exist_ok=True)
         
+        # 线程池限制并发数
+        self.pool.setMaxThreadCount(self.config["max_concurrent_tasks"])
+        
+        # 编码器信息（提交期间不变）
+        codec_name = self.video_codec.currentText()
+        ext = self.config["video_codecs"][codec_name]["extension"]
+        suffix = codec_name.lower()
+        files = [self.file_list.item(i).data(Qt.UserRole) for i in range(self.file_list.count())]
+        
+        # 已存在的输出文件（只读取一次目录，忽略大小写以兼容NAS/CIFS）
+        try:
+            with os.scandir(output_dir) as it:
+                existing = {e.name.casefold() for e in it}
+        except FileNotFoundError:
+            existing = set()
+        overwrite = self.overwrite.isChecked()
+        
         # 遍历文件
-        for i in range(self.file_list.count()):
-            item = self.file_list.item(i)
-            input_file = item.data(Qt.UserRole)
+        for input_file in files:
             base_name = os.path.splitext(os.path.basename(input_file))[0]
-            codec_name = self.video_codec.currentText()
-            ext = self.config["video_codecs"][codec_name]["extension"]
-            output_file = f"{output_dir}/{base_name}_{codec_name.lower()}.{ext}"
+            output_name = f"{base_name}_{suffix}.{ext}"
+            output_file = os.path.join(output_dir, output_name)
             
             # 检查覆盖
-            if os.path.exists(output_file) and not self.overwrite.isChecked():
+            if output_name.casefold() in existing and not overwrite:
                 QMessageBox.warning(self, "警告", f"{output_file}已存在！")
                 continue
             
             # 创建任务
-            task_id = f"task_{datetime.now().strftime('%Y%m%d%H%M%S')}_{i}"
+            task_id = f"task_{next(self._task_seq)}"
             cmd = self.build_command(input_file, output_file)
             
             # 添加任务项
@@ -528,31 +778,25 @@ class MainWindow(QMainWindow):
             self.task_list.addItem(task_item)
             self.task_list.setItemWidget(task_item, task_widget)
             
-            # 创建工作线程
+            # 创建转换任务
             worker = FFmpegWorker(cmd, input_file, output_file)
             worker.progress.connect(task_widget.update_progress)
             worker.status.connect(task_widget.update_status)
-            worker.log.connect(self.log_text.append)
-            worker.finished.connect(lambda s, m, tid=task_id: self.on_task_finish(tid, s, m))
+            worker.log.connect(self.log_text.appendPlainText)
+            worker.finished.connect(partial(self.on_task_finish, task_id))
             
             # 保存任务
             self.tasks[task_id] = {"worker": worker, "widget": task_widget, "item": task_item}
             
-            # 启动任务（限制并发数）
-            max_tasks = self.config["max_concurrent_tasks"]
-            if self.active_tasks < max_tasks:
-                worker.start()
-                self.active_tasks += 1
+            # 提交到线程池
+            self.pool.start(worker)
     
     def on_task_finish(self, task_id, success, msg):
         """任务完成"""
-        self.active_tasks -= 1
-        # 启动下一个任务
-        for tid, task in self.tasks.items():
-            if task["worker"].isRunning() == False and task["widget"].status_label.text() == "等待中":
-                task["worker"].start()
-                self.active_tasks += 1
-                break
+        if success:
+            logger.info(f"{task_id} 完成: {msg}")
+        else:
+            logger.warning(f"{task_id} 失败: {msg}")
     
     def cancel_task(self):
         """取消任务"""
@@ -564,7 +808,9 @@ class MainWindow(QMainWindow):
         widget = self.task_list.itemWidget(item)
         task_id = widget.task_id
         if task_id in self.tasks:
-            self.tasks[task_id]["worker"].stop()
+            worker = self.tasks[task_id]["worker"]
+            self.pool.tryTake(worker)
+            worker.stop()
             widget.update_status("已取消")
     
     def remove_task(self):
@@ -576,7 +822,10 @@ class MainWindow(QMainWindow):
         item = selected[0]
         widget = self.task_list.itemWidget(item)
         task_id = widget.task_id
-        if task_id in self.tasks and self.tasks[task_id]["worker"].isRunning() == False:
+        if task_id in self.tasks and not self.tasks[task_id]["worker"].running:
+            worker = self.tasks[task_id]["worker"]
+            self.pool.tryTake(worker)
+            worker.stop()
             self.task_list.takeItem(self.task_list.row(item))
             del self.tasks[task_id]
     
@@ -590,6 +839,30 @@ class MainWindow(QMainWindow):
         for tid in to_remove:
             self.task_list.takeItem(self.task_list.row(self.tasks[tid]["item"]))
             del self.tasks[tid]
+    
+    def closeEvent(self, event):
+        """关闭窗口时停止扫描和所有转换"""
+        # 中止文件夹扫描，等待线程结束后再释放
+        if self._scanner is not None:
+            self._scanner.abort()
+            self._scanner.wait()
+        # 丢弃排队中的任务
+        self.pool.clear()
+        # 已结束的任务调用stop()无副作用，全部停止以覆盖刚被线程池取出的任务
+        for task in self.tasks.values():
+            task["worker"].stop()
+        # 等待ffmpeg进程退出（q -> SIGTERM -> SIGKILL），避免子进程遗留
+        for task in self.tasks.values():
+            process = task["worker"].process
+            if process is None:
+                continue
+            try:
+                process.wait(timeout=STOP_GRACE_TIMEOUT + STOP_TERM_TIMEOUT)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+        self.pool.waitForDone(POOL_SHUTDOWN_TIMEOUT_MS)
+        super().closeEvent(event)
 
 def main():
     """主函数"""